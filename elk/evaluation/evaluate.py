@@ -29,10 +29,9 @@ class Eval(Run):
 
     @torch.inference_mode()
     def apply_to_layer(
-        self, layer: int, devices: list[str], world_size: int
+        self, layer: int, device: str
     ) -> tuple[dict[str, pd.DataFrame], dict]:
         """Evaluate a single reporter on a single layer."""
-        device = self.get_device(devices, world_size)
         val_output = self.prepare_data(device, layer, "val")
 
         experiment_dir = elk_reporter_dir() / self.source
@@ -94,4 +93,5 @@ class Eval(Run):
                         }
                     )
 
-        return {k: pd.DataFrame(v) for k, v in row_bufs.items()}, out_logprobs
+        dfs = {k: pd.DataFrame.from_records(v) for k, v in row_bufs.items()}
+        return dfs, out_logprobs
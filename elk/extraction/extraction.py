@@ -1,7 +1,7 @@
 """Functions for extracting the hidden states of a model."""
 import os
-from collections import defaultdict
 from dataclasses import InitVar, dataclass, replace
+from functools import cache
 from itertools import zip_longest
 from typing import Any, Iterable, Literal
 
@@ -179,6 +179,26 @@ def tokenize_dataset(
 
     max_length = assert_type(int, tokenizer.model_max_length)
 
+    # Every example reuses the same handful of answer choices, so we only need to
+    # tokenize each of them once instead of once per variant per example
+    @cache
+    def get_answer_id(choice: str) -> int:
+        a_id = tokenizer.encode(" " + choice, add_special_tokens=False)
+
+        # the Llama tokenizer splits off leading spaces
+        if tokenizer.decode(a_id[0]).strip() == "":
+            a_id_without_space = tokenizer.encode(choice, add_special_tokens=False)
+            assert a_id_without_space == a_id[1:]
+            a_id = a_id_without_space
+
+        if len(a_id) > 1:
+            print(
+                f"WARNING: answer choice '{choice}' is more than one "
+                "token, LM probabilities will be calculated using the "
+                f"first token only ({tokenizer.decode(a_id[0])})"
+            )
+        return a_id[0]
+
     out_records = []
     for example in prompt_ds:
         num_variants = len(example["template_names"])
@@ -191,48 +211,30 @@ def tokenize_dataset(
         any_too_long = False
         record_variants = []
 
+        statements = example["statements"]
+        suffixes = example["suffixes"] if cfg.get_lm_preds else [""] * len(statements)
+
+        # Tokenize all the variants of this example at once, rather than making
+        # separate tokenizer calls for each variant's statement and suffix
+        statement_ids = tokenizer(
+            statements,
+            # Keep [CLS] and [SEP] for BERT-style models
+            add_special_tokens=True,
+        ).input_ids
+        suffix_ids = tokenizer(suffixes, add_special_tokens=False).input_ids
+
         # Iterate over variants
-        for i, statement in enumerate(example["statements"]):
+        for i, statement in enumerate(statements):
+            suffix = suffixes[i]
             if cfg.get_lm_preds:
-                suffix = example["suffixes"][i]
                 answer_choices = example["answer_choices"][i]
                 assert len(answer_choices) == 2
-                answer_ids = []
-                for choice in answer_choices:
-                    a_id = tokenizer.encode(" " + choice, add_special_tokens=False)
-
-                    # the Llama tokenizer splits off leading spaces
-                    if tokenizer.decode(a_id[0]).strip() == "":
-                        a_id_without_space = tokenizer.encode(
-                            choice, add_special_tokens=False
-                        )
-                        assert a_id_without_space == a_id[1:]
-                        a_id = a_id_without_space
-
-                    if len(a_id) > 1:
-                        print(
-                            f"WARNING: answer choice '{choice}' is more than one "
-                            "token, LM probabilities will be calculated using the "
-                            f"first token only ({tokenizer.decode(a_id[0])})"
-                        )
-                    answer_ids.append(a_id[0])
-            else:
-                suffix = ""
-
-            suffix_tokens = torch.tensor(
-                tokenizer.encode(suffix, add_special_tokens=False),
-                dtype=torch.long,
-            )
+                answer_ids = [get_answer_id(choice) for choice in answer_choices]
 
-            encoding = tokenizer(
-                statement,
-                # Keep [CLS] and [SEP] for BERT-style models
-                add_special_tokens=True,
-                return_tensors="pt",
-            )
+            suffix_tokens = suffix_ids[i]
 
             # suffix comes right after the last statement token, before the answer
-            ids = torch.cat([encoding.input_ids, suffix_tokens.unsqueeze(0)], dim=-1)
+            ids = torch.tensor([statement_ids[i] + suffix_tokens], dtype=torch.long)
 
             # If this input is too long, skip it
             if ids.shape[-1] > max_length:
@@ -244,7 +246,7 @@ def tokenize_dataset(
                 variant_id=example["template_names"][i],
                 label=example["label"],
                 text=statement + suffix,
-                input_ids=ids.long(),
+                input_ids=ids,
             )
             if cfg.get_lm_preds:
                 out_record["answer_ids"] = answer_ids  # type: ignore
@@ -377,9 +379,13 @@ def extract(
         else:
             raise ValueError(f"Invalid token_loc: {cfg.token_loc}")
 
-        hidden_dict = dict()
-        for layer_idx, hidden in zip(layer_indices, hiddens):
-            hidden_dict[f"hidden_{layer_idx}"] = float_to_int16(hidden.flatten()).cpu()
+        # Convert and move all the layers to the CPU at once, so that we only pay
+        # for one finiteness check and one device-to-host copy for this input
+        stacked = float_to_int16(torch.stack([h.flatten() for h in hiddens])).cpu()
+        hidden_dict = {
+            f"hidden_{layer_idx}": hidden
+            for layer_idx, hidden in zip(layer_indices, stacked)
+        }
 
         if (answer_ids := kwargs.get("answer_ids")) is not None:
             # log_odds = log(p(yes)/(p(no)) = log(p(yes)) - log(p(no))
@@ -397,41 +403,69 @@ def extract(
         server: InferenceServer,
     ) -> Iterable[dict]:
         encodings = tokenize_dataset(cfg, split_type=split_type)
-        num_variants = len(encodings.unique("variant_id"))
+        variant_ids = sorted(encodings.unique("variant_id"))
+        variant_idx = {variant_id: i for i, variant_id in enumerate(variant_ids)}
+        num_variants = len(variant_ids)
 
         if not server.running:
             server.start()
         encodings = encodings.add_column("id", range(len(encodings)))  # type: ignore
 
-        buffer = defaultdict(list)  # row_id -> list of dicts
+        # The hiddens are written to disk by the builder as soon as we yield them, so
+        # the only other thing we need to keep around is the metadata for each input.
+        # Don't pull `input_ids` and friends back into Python for every output.
+        meta_cols = ("row_id", "variant_id", "label", "text")
+        metadata = encodings.remove_columns(
+            [col for col in encodings.column_names if col not in meta_cols]
+        )
+
+        # row_id -> partially filled record. We preallocate one (num_variants, ...)
+        # tensor per layer as soon as we see the first variant of a row, and copy each
+        # variant into its slot as it arrives, instead of holding on to every variant's
+        # tensors and stacking them at the end.
+        buffer: dict[int, dict[str, Any]] = {}
         for idx, (hidden_dict, lm_log_odds) in server.imap(
             select_hiddens,
             encodings,
             use_tqdm=False,
             model_kwargs=dict(output_hidden_states=True),
         ):
-            encoding = encodings[idx]
+            encoding = metadata[idx]
             row_id = encoding["row_id"]
-            buffer[row_id].append(
-                dict(lm_log_odds=lm_log_odds, **encoding, **hidden_dict)
-            )
-            if len(buffer[row_id]) == num_variants:
+            if row_id not in buffer:
+                buffer[row_id] = dict(
+                    label=encoding["label"],
+                    texts=[None] * num_variants,
+                    hiddens={
+                        k: v.new_empty((num_variants, *v.shape))
+                        for k, v in hidden_dict.items()
+                    },
+                    lm_log_odds=lm_log_odds.new_empty(
+                        (num_variants, *lm_log_odds.shape)
+                    ),
+                )
+
+            partial_record = buffer[row_id]
+            assert partial_record["label"] == encoding["label"]
+
+            i = variant_idx[encoding["variant_id"]]
+            assert partial_record["texts"][i] is None, "Duplicate variant"
+            partial_record["texts"][i] = encoding["text"]
+            partial_record["lm_log_odds"][i].copy_(lm_log_odds)
+            for k, v in hidden_dict.items():
+                partial_record["hiddens"][k][i].copy_(v)
+
+            if all(text is not None for text in partial_record["texts"]):
                 # we have a complete example
-                ex = buffer[row_id]
-                ex = sorted(ex, key=lambda d: d["variant_id"])
-                assert all(d["label"] == ex[0]["label"] for d in ex)
-                assert len(set(d["variant_id"] for d in ex)) == num_variants
                 out_record: dict[str, Any] = dict(
-                    variant_ids=[d["variant_id"] for d in ex],
-                    label=ex[0]["label"],
-                    row_id=ex[0]["row_id"],
-                    texts=[d["text"] for d in ex],
-                    **{k: torch.stack([d[k] for d in ex]) for k in hidden_dict},
+                    variant_ids=variant_ids,
+                    label=partial_record["label"],
+                    row_id=row_id,
+                    texts=partial_record["texts"],
+                    **partial_record["hiddens"],
                 )
                 if cfg.get_lm_preds:
-                    out_record["lm_log_odds"] = torch.stack(
-                        [d["lm_log_odds"] for d in ex]  # type: ignore
-                    )
+                    out_record["lm_log_odds"] = partial_record["lm_log_odds"]
                 del buffer[row_id]
                 yield out_record
 
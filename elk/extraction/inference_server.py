@@ -4,16 +4,16 @@ import multiprocessing as std_mp
 import os
 import socket
 import warnings
+from collections import deque
 from dataclasses import dataclass
 from functools import partial
-from itertools import cycle
 from typing import Any, Callable, Iterable, Type, cast
 
 import dill
 import torch
 import torch.distributed as dist
 import torch.multiprocessing as mp
-from datasets import Dataset
+from datasets import Dataset, concatenate_datasets
 from torch.distributed.fsdp import CPUOffload
 from torch.distributed.fsdp import FullyShardedDataParallel as FSDP
 from torch.distributed.fsdp.wrap import transformer_auto_wrap_policy
@@ -191,33 +191,20 @@ class InferenceServer:
             raise RuntimeError("Can't run inference on a server that isn't running")
 
         assert "id" in dataset.column_names, "Dataset must contain an 'id' column"
-        if len(dataset) % self.num_workers != 0:
-            # server requires that the dataset's length is a multiple of the world size
-            assert self.num_workers != -1
-
-            # duplicate some rows
-            num_rows = len(dataset)
-            num_needed = self.num_workers - (num_rows % self.num_workers)
-            dummy = dataset[0]
-            dummy_id = dummy["id"]
-            for _ in range(num_needed):
-                dataset = dataset.add_item(dummy)  # type: ignore
-        else:
-            dummy_id = -1
-
-        # We need PyTorch tensors
-        dataset = dataset.with_format("torch")
+        # server requires that the dataset's length is a multiple of the world size
+        assert self.num_workers != -1
+        shards, dummy_id = pad_and_shard(dataset, self.num_workers)
 
         # Pickle the closure and send it to the workers
         closure_pkl = dill.dumps(closure)
         model_kwargs_pkl = dill.dumps(model_kwargs or {})
-        shards = [dataset.shard(self.num_workers, i) for i in range(self.num_workers)]
         for q, shard in zip(self._task_queues, shards):
-            q.put((closure_pkl, model_kwargs_pkl, shard))
+            # We need PyTorch tensors
+            q.put((closure_pkl, model_kwargs_pkl, shard.with_format("torch")))
 
         generator = round_robin(self._result_queues)  # type: ignore[arg-type]
         seen_ids = set()
-        for out in tqdm(generator, total=len(dataset), disable=not use_tqdm):
+        for out in tqdm(generator, total=sum(map(len, shards)), disable=not use_tqdm):
             if out[0] == dummy_id:
                 if dummy_id in seen_ids:
                     continue  # ignore any extra dummy rows
@@ -268,24 +255,48 @@ def find_available_port() -> int:
     return port
 
 
+def pad_and_shard(dataset: Dataset, num_shards: int) -> tuple[list[Dataset], int]:
+    """Split `dataset` into `num_shards` contiguous shards of equal length.
+
+    If the length of `dataset` isn't a multiple of `num_shards`, it's padded with
+    copies of its first row.
+
+    Returns:
+        The shards, and the `id` of the duplicated row, or -1 if no padding was needed.
+    """
+    if len(dataset) % num_shards != 0:
+        # duplicate some rows. We do this in one shot, since add_item builds a whole
+        # new dataset every time it's called. The padding has to be flattened, or
+        # `concatenate_datasets` would put an indices mapping over the whole result
+        num_needed = num_shards - (len(dataset) % num_shards)
+        dummy_id = dataset[0]["id"]
+        padding = dataset.select([0] * num_needed).flatten_indices()
+        dataset = concatenate_datasets([dataset, padding])
+    else:
+        dummy_id = -1
+
+    # Contiguous shards are plain slices of the Arrow table. Strided shards (the
+    # default in older versions of datasets) need an indices mapping, which turns
+    # every read in the workers into a random access.
+    shards = [dataset.shard(num_shards, i, contiguous=True) for i in range(num_shards)]
+    return shards, dummy_id
+
+
 def round_robin(queues: list[mp.Queue]) -> Iterable[Any]:
     """Yield items from the given queues in round-robin order."""
-    exhausted = set()
-
-    for idx, q in cycle(enumerate(queues)):
-        if len(exhausted) == len(queues):
-            break
-        if idx in exhausted:
-            continue
+    # Queues are dropped from the rotation as soon as they're exhausted, so we don't
+    # keep revisiting them
+    active = deque(queues)
 
+    while active:
+        q = active.popleft()
         try:
             item = q.get(timeout=0.01)
         except std_mp.queues.Empty:  # type: ignore[attr-defined]
-            pass
+            active.append(q)
         else:
-            if item == SENTINEL:
-                exhausted.add(idx)
-            else:
+            if item != SENTINEL:
+                active.append(q)
                 yield item
 
 
@@ -1,16 +1,18 @@
 from collections import Counter
+from functools import cache
 from random import Random
 from typing import Any, Iterator, Literal
 
-from datasets import ClassLabel, Dataset, Value, load_dataset
+import numpy as np
+from datasets import ClassLabel, Dataset, Value, interleave_datasets, load_dataset
 
-from ..promptsource import DatasetTemplates
+from ..promptsource import DatasetTemplates, Template
 from ..utils import (
     assert_type,
     infer_label_column,
     select_split,
 )
-from .balanced_sampler import BalancedSampler, FewShotSampler
+from .balanced_sampler import FewShotSampler
 
 
 def load_prompts(
@@ -23,6 +25,7 @@ def load_prompts(
     include_answers: bool = False,
     balance: bool = True,
     statement_column: str | None = None,
+    debug: bool = False,
 ) -> Iterator[dict]:
     """Load a dataset full of prompts generated from the specified dataset.
 
@@ -35,6 +38,8 @@ def load_prompts(
         split_type: Whether to use the train or val split of the dataset.
         template_path: Path to feed into `DatasetTemplates` for loading templates.
         statement_column: Name of the column to use for the statement text.
+        debug: Whether to check that no two templates produce the same prompt for
+            any example. This is slow, so it's off by default.
 
     Returns:
         An iterable of prompt dictionaries.
@@ -85,6 +90,9 @@ def load_prompts(
         label_choices = sorted(ds.unique(label_column))
         print(f"Using the following pseudo-labels: {label_choices}")
 
+    # The templates don't change from one example to the next
+    templates = list(prompter.templates.values())
+
     rng = Random(seed)
     if num_shots > 0:
         train_name = select_split(ds_dict, "train")
@@ -99,11 +107,26 @@ def load_prompts(
 
     if label_column in ds.features and balance:
         print(f"Balancing dataset by {label_column}")
-        ds = BalancedSampler(
-            ds.to_iterable_dataset(),
-            set(label_choices),
-            label_col=label_column,
-        )
+
+        # Split the (shuffled) dataset into one view per class, then let
+        # `interleave_datasets` alternate between them. This is exactly balanced,
+        # and the per-class indices are found with vectorized NumPy ops over the
+        # label column instead of buffering examples one at a time in Python.
+        labels = np.asarray(ds.with_format("numpy")[label_column])
+        unknown = ~np.isin(labels, label_choices)
+        if unknown.any():
+            raise ValueError(
+                f"Expected label to be one of {label_choices}, "
+                f"got {labels[unknown.argmax()]}"
+            )
+        class_indices = {
+            label: np.flatnonzero(labels == label) for label in label_choices
+        }
+
+        ds = interleave_datasets(
+            [ds.select(class_indices[label]) for label in label_choices],
+            stopping_strategy="first_exhausted",
+        ).to_iterable_dataset()
     else:
         if balance:
             print("No label column found, not balancing")
@@ -114,34 +137,37 @@ def load_prompts(
             example,
             label_column=label_column,
             label_choices=label_choices,  # type: ignore[arg-type]
-            prompter=prompter,
+            templates=templates,
             include_answers=include_answers,
             fewshot_iter=fewshot_iter,
+            debug=debug,
         )
 
 
 def _convert_to_prompts(
     example: dict[str, Any],
-    prompter: DatasetTemplates,
+    templates: list[Template],
     label_column: str,
     label_choices: list[bool | int | str],
     include_answers: bool = False,
     fewshot_iter: Iterator[list[dict]] | None = None,
+    debug: bool = False,
 ) -> dict[str, Any]:
     """Prompt-generating function to pass to `IterableDataset.map`."""
     statements = []
-    templates = list(prompter.templates.values())
+    fixed_choices = [template.get_fixed_answer_choices_list() for template in templates]
 
-    # For sanity checking that prompts are unique
-    prompt_counter = Counter()
+    # For sanity checking that prompts are unique. We only do this when debugging,
+    # since it means hashing every prompt of every example
+    prompt_counter = Counter() if debug else None
     label = example[label_column]
 
-    for template in templates:
+    for template, choices in zip(templates, fixed_choices):
         statement = template.apply(example)
 
-        choices = template.get_fixed_answer_choices_list()
-        choices = tuple(choices) if choices is not None else None
-        prompt_counter[(statement, choices)] += 1
+        if prompt_counter is not None:
+            choices = tuple(choices) if choices is not None else None
+            prompt_counter[(statement, choices)] += 1
 
         if fewshot_iter is not None:
             # Infinite iterator so we don't need to worry about StopIteration
@@ -152,9 +178,10 @@ def _convert_to_prompts(
         statements.append(statement)
 
     # Sanity check: variants should be unique
-    ((maybe_dup, dup_count),) = prompt_counter.most_common(1)
-    if dup_count > 1:
-        raise ValueError(f'Prompt duplicated {dup_count} times! "{maybe_dup}"')
+    if prompt_counter is not None:
+        ((maybe_dup, dup_count),) = prompt_counter.most_common(1)
+        if dup_count > 1:
+            raise ValueError(f'Prompt duplicated {dup_count} times! "{maybe_dup}"')
 
     # Our reporter training and evaluation code assumes that the labels are integers.
     # If they're not, we need to convert them with index(). label_choices is guaranteed
@@ -167,17 +194,21 @@ def _convert_to_prompts(
     )
     if include_answers:
         out_dict.update(
-            answer_choices=[
-                template.get_fixed_answer_choices_list() for template in templates
-            ],
+            answer_choices=fixed_choices,
             suffixes=[template.suffix for template in templates],
         )
     return out_dict
 
 
+@cache
 def get_prompter(
     ds_name: str, config_name: str | None, template_path: str | None = None
 ) -> tuple[DatasetTemplates, bool]:
+    """Load the prompt templates for a dataset, and whether they're the blank default.
+
+    The result is cached, since the templates are loaded from YAML and we ask for
+    them more than once per run. Callers must not modify the returned templates.
+    """
     if template_path is None:
         try:
             return DatasetTemplates(ds_name, config_name), False
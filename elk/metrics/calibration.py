@@ -58,9 +58,13 @@ class CalibrationError:
         # Based on Algorithm 1 in Roelofs et al. (2020).
         # Using a single bin is guaranteed to be monotonic, so we start there.
         b_star, accs_star = 1, labels.mean().unsqueeze(0)
+
+        # Running totals let us get the mean of every bin with a single gather for
+        # any number of bins, instead of launching one kernel per bin per iteration
+        label_sums = torch.cat([labels.new_zeros(1), labels.cumsum(0)])
         for b in range(2, n + 1):
             # Split into (nearly) equal mass bins
-            freqs = torch.stack([h.mean() for h in labels.tensor_split(b)])
+            freqs = _bin_means(label_sums, b)
 
             # This binning is not strictly monotonic, let's break
             if not torch.all(freqs[1:] > freqs[:-1]):
@@ -84,3 +88,23 @@ class CalibrationError:
         ece = torch.sum(w * torch.abs(accs_star - mean_confs) ** p) ** (1 / p)
 
         return CalibrationEstimate(float(ece), b_star)
+
+
+def _bin_means(cumsum: Tensor, num_bins: int) -> Tensor:
+    """Means of `num_bins` (nearly) equal mass bins, split like `Tensor.tensor_split`.
+
+    Args:
+        cumsum: Cumulative sum of the sorted data with a leading zero, shape [n + 1].
+        num_bins: The number of bins to split the data into.
+
+    Returns:
+        A tensor of shape [num_bins] containing the mean of each bin.
+    """
+    n = cumsum.shape[0] - 1
+
+    # tensor_split gives the first n % num_bins bins one extra element
+    q, r = divmod(n, num_bins)
+    idx = torch.arange(num_bins + 1, device=cumsum.device)
+    bounds = idx * q + idx.clamp(max=r)
+
+    return (cumsum[bounds[1:]] - cumsum[bounds[:-1]]) / bounds.diff()
@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -212,7 +213,6 @@ class ModelVisualization:
         Returns:
             The ModelVisualization instance containing the evaluation data.
         """
-        df = pd.DataFrame()
         model_name = model_path.name
         is_transfer = False
 
@@ -225,18 +225,24 @@ class ModelVisualization:
                     for train_dir in toplevel.iterdir():
                         yield train_dir
 
+        # (path, eval_dataset, train_dataset) for each CSV we need to read
+        csv_args = []
         for train_dir in get_train_dirs(model_path):
-            eval_df = cls._read_eval_csv(train_dir, train_dir.name, train_dir.name)
-            df = pd.concat([df, eval_df], ignore_index=True)
+            csv_args.append((train_dir, train_dir.name, train_dir.name))
             transfer_dir = train_dir / "transfer"
             if transfer_dir.exists():
                 is_transfer = True
                 for eval_ds_dir in transfer_dir.iterdir():
-                    eval_df = cls._read_eval_csv(
-                        eval_ds_dir, eval_ds_dir.name, train_dir.name
-                    )
-                    df = pd.concat([df, eval_df], ignore_index=True)
+                    csv_args.append((eval_ds_dir, eval_ds_dir.name, train_dir.name))
 
+        # Reading the CSVs is I/O bound, and sweeps can have hundreds of them on a
+        # network filesystem, so read them concurrently. map() preserves the order.
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            dfs = list(executor.map(lambda args: cls._read_eval_csv(*args), csv_args))
+
+        # Concatenate once at the end; growing the frame inside the loop copies
+        # everything read so far on every iteration
+        df = pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
         df["model_name"] = model_name
         return cls(df, model_name, is_transfer)
 
@@ -3,6 +3,7 @@ import random
 import uuid
 from collections import Counter
 from dataclasses import dataclass
+from functools import cache
 from pathlib import Path
 from typing import ClassVar
 
@@ -60,6 +61,29 @@ env.filters["reorder"] = reorder
 env.filters["to_letter"] = to_letter
 
 
+@cache
+def _compile_jinja(source: str):
+    """Compiles a Jinja template string, reusing the result for repeated sources.
+
+    `Environment.from_string` recompiles on every call, and we render the same
+    handful of templates for every example in the dataset.
+    """
+    return env.from_string(source)
+
+
+@cache
+def _render_fixed_answer_choices(jinja: str) -> tuple[str, ...] | None:
+    """Renders an answer choices expression if it doesn't depend on the example"""
+    variables = meta.find_undeclared_variables(env.parse(jinja))
+    if len(variables) > 0:
+        return None
+
+    rendered_choices = _compile_jinja(jinja).render()
+    return tuple(
+        answer_choice.strip() for answer_choice in rendered_choices.split("|||")
+    )
+
+
 class Template(yaml.YAMLObject):
     """
     A prompt template.
@@ -110,7 +134,7 @@ class Template(yaml.YAMLObject):
         if jinja is None:
             return None
 
-        rtemplate = env.from_string(jinja)
+        rtemplate = _compile_jinja(jinja)
         protected_example = self._escape_pipe(example)
         rendered_choices = rtemplate.render(**protected_example)
         return [
@@ -127,16 +151,8 @@ class Template(yaml.YAMLObject):
         if jinja is None:
             return None
 
-        parse = env.parse(jinja)
-        variables = meta.find_undeclared_variables(parse)
-        if len(variables) == 0:
-            rtemplate = env.from_string(jinja)
-            rendered_choices = rtemplate.render()
-            return [
-                answer_choice.strip() for answer_choice in rendered_choices.split("|||")
-            ]
-        else:
-            return None
+        choices = _render_fixed_answer_choices(jinja)
+        return list(choices) if choices is not None else None
 
     def apply(self, example, truncate=False, highlight_variables=False):
         """
@@ -159,7 +175,7 @@ class Template(yaml.YAMLObject):
         if highlight_variables:
             jinja = jinja.replace("}}", " | highlight }}")
 
-        rtemplate = env.from_string(jinja)
+        rtemplate = _compile_jinja(jinja)
 
         protected_example = self._escape_pipe(example)
 
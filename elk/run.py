@@ -1,4 +1,3 @@
-import os
 import random
 from abc import ABC, abstractmethod
 from collections import defaultdict
@@ -30,6 +29,20 @@ from .utils import (
     select_usable_devices,
 )
 
+# The device claimed by the current `Run.apply_to_layers` pool worker
+_worker_device: str | None = None
+
+
+def _claim_device(device_queue) -> None:
+    """Pool initializer that assigns each worker a device for its whole lifetime."""
+    global _worker_device
+    _worker_device = device_queue.get()
+
+
+def _apply_on_worker_device(func: Callable, layer: int):
+    """Run `func` on `layer` using the device claimed by this pool worker."""
+    return func(layer, assert_type(str, _worker_device))
+
 
 @dataclass
 class LayerData:
@@ -119,15 +132,11 @@ class Run(ABC, Serializable):
             )
 
         devices = select_usable_devices(self.num_gpus, min_memory=self.min_gpu_mem)
-        num_devices = len(devices)
-        func: Callable[[int], tuple[dict[str, pd.DataFrame], dict]] = partial(
-            self.apply_to_layer, devices=devices, world_size=num_devices
-        )
-        self.apply_to_layers(func=func, num_devices=num_devices)
+        self.apply_to_layers(func=self.apply_to_layer, devices=devices)
 
     @abstractmethod
     def apply_to_layer(
-        self, layer: int, devices: list[str], world_size: int
+        self, layer: int, device: str
     ) -> tuple[dict[str, pd.DataFrame], dict]:
         """Train or eval a reporter on a single layer."""
 
@@ -138,13 +147,6 @@ class Run(ABC, Serializable):
         random.seed(seed)
         torch.manual_seed(seed)
 
-    def get_device(self, devices, world_size: int) -> str:
-        """Get the device for the current process."""
-
-        rank = os.getpid() % world_size
-        device = devices[rank]
-        return device
-
     def prepare_data(
         self, device: str, layer: int, split_type: Literal["train", "val"]
     ) -> dict[str, LayerData]:
@@ -161,10 +163,14 @@ class Run(ABC, Serializable):
                 "torch", device=device, dtype=torch.int16, columns=hidden_cols
             )
             # hiddens shape: (num_examples, num_variants, hidden_d)
-            hiddens = int16_to_float32(assert_type(Tensor, split[f"hidden_{layer}"]))
+            hiddens = assert_type(Tensor, split[f"hidden_{layer}"])
             if self.prompt_indices:
                 hiddens = hiddens[:, self.prompt_indices]
 
+            # Upcast after selecting the prompts, so we never materialize float32
+            # copies of the variants we're going to throw away
+            hiddens = int16_to_float32(hiddens)
+
             # convert the remaining columns to torch
             split = split.with_format("torch", device=device)
             labels = assert_type(Tensor, split["label"])
@@ -193,16 +199,17 @@ class Run(ABC, Serializable):
 
     def apply_to_layers(
         self,
-        func: Callable[[int], tuple[dict[str, pd.DataFrame], dict]],
-        num_devices: int,
+        func: Callable[[int, str], tuple[dict[str, pd.DataFrame], dict]],
+        devices: list[str],
     ):
         """Apply a function to each layer of the datasets in parallel
         and writes the results to a CSV file.
 
         Args:
-            func: The function to apply to each layer.
-                The int is the index of the layer.
-            num_devices: The number of devices to use.
+            func: The function to apply to each layer. It takes the index of the
+                layer and the device to run on.
+            devices: The devices to use. Layers on different devices run in
+                parallel, while layers on the same device run one after another.
         """
         self.out_dir = assert_type(Path, self.out_dir)
 
@@ -212,16 +219,30 @@ class Run(ABC, Serializable):
         if self.concatenated_layer_offset > 0:
             layers = self.concatenate(layers)
 
+        num_devices = len(devices)
         ctx = mp.get_context("spawn")
-        with ctx.Pool(num_devices) as pool:
-            mapper = pool.imap_unordered if num_devices > 1 else map
+
+        # Each worker claims a device of its own when it starts up, and keeps it for
+        # its whole lifetime. Picking a device per task (e.g. based on the PID) can
+        # put two workers on the same GPU while another one sits idle.
+        device_queue = ctx.Queue()
+        for device in devices:
+            device_queue.put(device)
+
+        with ctx.Pool(
+            num_devices, initializer=_claim_device, initargs=(device_queue,)
+        ) as pool:
+            if num_devices > 1:
+                worker_func = partial(_apply_on_worker_device, func)
+                mapper = partial(pool.imap_unordered, worker_func)
+            else:
+                mapper = partial(map, partial(func, device=devices[0]))
+
             df_buffers = defaultdict(list)
             logprobs_dicts = defaultdict(dict)
 
             try:
-                for df_dict, logprobs_dict in tqdm(
-                    mapper(func, layers), total=len(layers)
-                ):
+                for df_dict, logprobs_dict in tqdm(mapper(layers), total=len(layers)):
                     # get arbitrary value
                     df_ = next(iter(df_dict.values()))
                     layer = df_["layer"].iloc[0]
@@ -1,6 +1,5 @@
 import torch
 from concept_erasure import LeaceFitter
-from einops import rearrange, repeat
 
 from ..run import LayerData
 from .classifier import Classifier
@@ -22,7 +21,7 @@ def train_supervised(
 
     for train_data in data.values():
         (n, v, d) = train_data.hiddens.shape
-        train_h = rearrange(train_data.hiddens, "n v d -> (n v) d")
+        train_h = train_data.hiddens.reshape(n * v, d)
 
         if erase_paraphrases and v > 1:
             if leace is None:
@@ -38,12 +37,17 @@ def train_supervised(
             )  # (n * v, v)
             leace = leace.update(train_h, indicators)
 
-        labels = repeat(train_data.labels, "n -> (n v)", v=v)
+        labels = train_data.labels.repeat_interleave(v)
 
         Xs.append(train_h)
         train_labels.append(labels)
 
-    X, train_labels = torch.cat(Xs), torch.cat(train_labels)
+    # Skip the concatenation in the common single-dataset case, since torch.cat
+    # always copies its inputs, even when there's only one of them
+    if len(Xs) > 1:
+        X, train_labels = torch.cat(Xs), torch.cat(train_labels)
+    else:
+        (X,), (train_labels,) = Xs, train_labels
     eraser = leace.eraser if leace is not None else None
 
     if mode == "cv":
@@ -1,6 +1,8 @@
 """Main training loop."""
 
+import io
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Literal
@@ -14,6 +16,11 @@ from ..run import Run
 from ..training.supervised import train_supervised
 from ..utils.typing import assert_type
 
+# Writes a layer's checkpoint to disk while we evaluate that same layer's models.
+# `apply_to_layer` waits for the write before returning, so there's only ever one
+# in flight and it never overlaps with the next layer.
+_checkpoint_writer = ThreadPoolExecutor(max_workers=1)
+
 
 @dataclass
 class Elicit(Run):
@@ -52,13 +59,11 @@ class Elicit(Run):
     def apply_to_layer(
         self,
         layer: int,
-        devices: list[str],
-        world_size: int,
+        device: str,
     ) -> tuple[dict[str, pd.DataFrame], dict]:
         """Train a single reporter on a single layer."""
 
         self.make_reproducible(seed=self.seed + layer)
-        device = self.get_device(devices, world_size)
 
         train_dict = self.prepare_data(device, layer, "train")
         val_dict = self.prepare_data(device, layer, "val")
@@ -79,8 +84,14 @@ class Elicit(Run):
             mode=self.supervised,
             max_inlp_iter=self.max_inlp_iter,
         )
-        with open(lr_dir / f"layer_{layer}.pt", "wb") as file:
-            torch.save(lr_models, file)
+        # Serialize on this thread so the bytes can't change under us, then hand
+        # them off to be written in the background
+        buf = io.BytesIO()
+        torch.save(lr_models, buf)
+        lr_path = lr_dir / f"layer_{layer}.pt"
+        checkpoint_saved = _checkpoint_writer.submit(
+            lr_path.write_bytes, buf.getbuffer()
+        )
 
         out_logprobs = defaultdict(dict)
         row_bufs = defaultdict(list)
@@ -148,4 +159,8 @@ class Elicit(Run):
                         }
                     )
 
-        return {k: pd.DataFrame(v) for k, v in row_bufs.items()}, out_logprobs
+        # Make sure the checkpoint is on disk (and surface any errors) before we
+        # report this layer as done, since the pool might shut down right after
+        checkpoint_saved.result()
+        dfs = {k: pd.DataFrame.from_records(v) for k, v in row_bufs.items()}
+        return dfs, out_logprobs
@@ -13,13 +13,17 @@ COLOR_CODES = {
 }
 Color = Literal["black", "red", "green", "yellow", "blue", "magenta", "cyan", "white"]
 
+# Format strings for each color, built once at import time.
+_COLOR_FORMATS = {
+    name: f"\033[{code}m{{}}\033[0m" for name, code in COLOR_CODES.items()
+}
+
 
 def colorize(message: str, color: Color) -> str:
     """Colorize a message for terminal output."""
-    # Get the ANSI color code based on the human-readable color name.
-    code = COLOR_CODES.get(color.lower())
-    if code is None:
-        raise ValueError(f"Invalid color name: {color}")
+    try:
+        fmt = _COLOR_FORMATS[color.lower()]
+    except KeyError:
+        raise ValueError(f"Invalid color name: {color}") from None
 
-    # Construct and return the colored message.
-    return f"\033[{code}m{message}\033[0m"
+    return fmt.format(message)
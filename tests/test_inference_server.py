@@ -1,9 +1,16 @@
+from queue import Queue
+
 import pytest
 import torch
 from datasets import Dataset
 from transformers import AutoModelForCausalLM, AutoTokenizer
 
-from elk.extraction.inference_server import InferenceServer
+from elk.extraction.inference_server import (
+    SENTINEL,
+    InferenceServer,
+    pad_and_shard,
+    round_robin,
+)
 
 
 @pytest.mark.gpu
@@ -51,3 +58,38 @@ def test_inference_server():
     test_config(fsdp=True, num_workers=-1)
     test_config(fsdp=True, num_workers=1)
     test_config(fsdp=True, num_workers=2)
+
+
+def test_round_robin():
+    queues = [Queue() for _ in range(3)]
+    for i, q in enumerate(queues):
+        for j in range(i + 1):
+            q.put((i, j))
+        q.put(SENTINEL)
+
+    # Exhausted queues drop out of the rotation, the rest keep alternating
+    assert list(round_robin(queues)) == [  # type: ignore[arg-type]
+        (0, 0),
+        (1, 0),
+        (2, 0),
+        (1, 1),
+        (2, 1),
+        (2, 2),
+    ]
+
+
+def test_pad_and_shard():
+    dataset = Dataset.from_dict({"id": list(range(6)), "x": [[i] for i in range(6)]})
+
+    # Needs more than one row of padding, since a single-row select is a plain slice
+    shards, dummy_id = pad_and_shard(dataset, 4)
+    assert dummy_id == 0
+    assert [len(shard) for shard in shards] == [2, 2, 2, 2]
+    assert [row for shard in shards for row in shard["id"]] == [*range(6), 0, 0]
+
+    # The shards should be plain slices of the table, with no indices mapping
+    assert all(shard._indices is None for shard in shards)
+
+    shards, dummy_id = pad_and_shard(dataset.select(range(4)), 2)
+    assert dummy_id == -1
+    assert [list(shard["id"]) for shard in shards] == [[0, 1], [2, 3]]
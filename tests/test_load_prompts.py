@@ -1,9 +1,11 @@
+from collections import Counter
 from itertools import islice
 from typing import Literal
 
 import pytest
+from datasets import ClassLabel, Dataset, DatasetDict, Features, Value
 
-from elk.extraction import Extract, load_prompts
+from elk.extraction import Extract, load_prompts, prompt_loading
 from elk.promptsource.templates import DatasetTemplates
 
 
@@ -38,3 +40,29 @@ def test_load_prompts():
     cfg = Extract.load_yaml("tests/dbpedia_prompts.yaml")
     test_single_split(cfg, "train")
     test_single_split(cfg, "val")
+
+
+def test_load_prompts_balanced(monkeypatch: pytest.MonkeyPatch):
+    features = Features(
+        {"statement": Value("string"), "label": ClassLabel(names=["no", "yes"])}
+    )
+
+    def fake_load_dataset(labels: list[int]):
+        ds = Dataset.from_dict(
+            {"statement": [f"s{i}" for i in range(len(labels))], "label": labels},
+            features=features,
+        )
+        monkeypatch.setattr(
+            prompt_loading, "load_dataset", lambda *_: DatasetDict(train=ds)
+        )
+
+    # 3:1 class imbalance, so balancing should stop once the minority runs out
+    fake_load_dataset([1, 1, 0, 1, 1, 0, 1, 1])
+    records = list(load_prompts("elk_test_balance", split_type="train"))
+    counts = Counter(record["label"] for record in records)
+    assert counts == {0: 2, 1: 2}
+
+    # -1 is a valid ClassLabel value for unlabeled examples, but not a usable label
+    fake_load_dataset([0, 1, -1, 1])
+    with pytest.raises(ValueError, match="Expected label"):
+        list(load_prompts("elk_test_balance", split_type="train"))
@@ -8,6 +8,7 @@ from sklearn.metrics import roc_auc_score
 from torch.distributions.normal import Normal
 
 from elk.metrics import accuracy_ci, roc_auc
+from elk.metrics.calibration import CalibrationError
 
 
 def test_auroc_and_acc():
@@ -85,3 +86,32 @@ def test_auroc_and_acc():
     acc_ci = accuracy_ci(y_true_1d_reshaped, hard_preds_reshaped, level=level)
     assert math.isclose(acc_ci.lower, lower, rel_tol=2e-3)
     assert math.isclose(acc_ci.upper, upper, rel_tol=2e-3)
+
+
+def test_calibration_error():
+    rng = torch.Generator().manual_seed(42)
+
+    for n in (2, 10, 999):
+        probs = torch.rand(n, generator=rng)
+        labels = torch.bernoulli(probs, generator=rng)
+        est = CalibrationError().update(labels, probs).compute()
+
+        # Reference implementation of the monotonic sweep, one kernel per bin
+        probs, indices = probs.sort()
+        labels = labels[indices]
+        b_star, accs_star = 1, labels.mean().unsqueeze(0)
+        for b in range(2, n + 1):
+            freqs = torch.stack([h.mean() for h in labels.tensor_split(b)])
+            if not torch.all(freqs[1:] > freqs[:-1]):
+                break
+            elif not torch.all(freqs * (1 - freqs)):
+                break
+            accs_star, b_star = freqs, b
+
+        conf_bins = probs.tensor_split(b_star)
+        w = probs.new_tensor([len(c) / n for c in conf_bins])
+        mean_confs = torch.stack([c.mean() for c in conf_bins])
+        ece = torch.sum(w * torch.abs(accs_star - mean_confs) ** 2) ** 0.5
+
+        assert est.num_bins == b_star
+        assert math.isclose(est.ece, float(ece), rel_tol=1e-6)